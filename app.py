@@ -4,16 +4,68 @@ import requests
 from bs4 import BeautifulSoup
 import re
 import secrets
+import stat
 import traceback
 import random
+import os
+import hashlib
+import sys
+import json
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
 from datetime import datetime, timedelta
 
 app = Flask(__name__)
-app.secret_key = secrets.token_hex(16)
+# A fixed SECRET_KEY keeps signed state valid across restarts
+app.secret_key = os.environ.get('SECRET_KEY') or secrets.token_hex(16)
 CORS(app, origins=["http://localhost:5173", "http://127.0.0.1:5173"], supports_credentials=True)
 
 BASE_URL = "https://lis-hac.eschoolplus.powerschool.com"
 
+# Compact record types for parsed HAC data. Flask's JSON provider serializes
+# dataclasses as dicts, so the API payloads keep the same keys as before.
+@dataclass
+class Assignment:
+    __slots__ = ('date_due', 'date_assigned', 'name', 'category', 'score')
+    date_due: str
+    date_assigned: str
+    name: str
+    category: str
+    score: str
+
+@dataclass
+class Course:
+    __slots__ = ('name', 'grade', 'numeric_grade', 'gpa', 'course_id', 'assignments')
+    name: str
+    grade: str
+    numeric_grade: Optional[float]
+    gpa: Optional[float]
+    course_id: str
+    assignments: list
+
+@dataclass
+class ReportCardRow:
+    __slots__ = ('course', 'course_code', 'grade', 'numeric_grade', 'gpa')
+    course: str
+    course_code: str
+    grade: int
+    numeric_grade: int
+    gpa: float
+
+@dataclass
+class PastCycleCourse:
+    __slots__ = ('course_name', 'grade', 'gpa')
+    course_name: str
+    grade: int
+    gpa: float
+
+def intern_text(text):
+    # Category, course and cycle names repeat across every row and session
+    return sys.intern(text) if text else text
+
 def create_session_and_login(username, password):
     sess = requests.Session()
     login_url = f"{BASE_URL}/HomeAccess/Account/LogOn"
@@ -73,153 +125,142 @@ def get_assignments_for_class_internal(cls):
                 date_due = cells[0].get_text(strip=True)
                 date_assigned = cells[1].get_text(strip=True)
                 assignment_name = cells[2].get_text(strip=True)
-                category = cells[3].get_text(strip=True)
+                category = intern_text(cells[3].get_text(strip=True))
                 score = cells[4].get_text(strip=True) if len(cells) > 4 else 'N/A'
                 
-                assignments.append({
-                    'date_due': date_due,
-                    'date_assigned': date_assigned,
-                    'name': assignment_name,
-                    'category': category,
-                    'score': score
-                })
+                assignments.append(Assignment(
+                    date_due=date_due,
+                    date_assigned=date_assigned,
+                    name=assignment_name,
+                    category=category,
+                    score=score
+                ))
     
     return assignments
 
-def get_grades_data(sess, cycle=None, session_id=None):
-    grades_url = f"{BASE_URL}/HomeAccess/Content/Student/Assignments.aspx"
-    
-    # Optimization: Use cached ViewState to skip initial GET if possible
-    # (ASP.NET ViewState is required for PostBacks)
-    
-    # Initial fetch
-    # If we have a cycle switch request, we normally need to GET first to establish state, then POST.
-    # But if we just visited this page (cached in user_viewstates), we might be able to create soup from that.
-    
-    # For now, stick to reliable fetching but keeping the structure for future optimizations
-    grades_response = sess.get(grades_url)
-    soup = BeautifulSoup(grades_response.text, 'html.parser')
-    
-    # Store ViewState for potential future use (optimization)
-    if session_id:
-        form = soup.find('form')
-        if form:
-             viewstate = form.find('input', dict(name='__VIEWSTATE'))
-             if viewstate:
-                 user_viewstates[session_id] = viewstate.get('value')
+# Extraction plans learned once per page-structure fingerprint and shared by all sessions
+layout_plans = {}
+LAYOUT_PLAN_LIMIT = 64
 
-    # Handle Cycle Selection
-    available_cycles = []
-    current_cycle = None
-    
-    # Try to find the grading cycle dropdown
-    cycle_dropdown = None
+CYCLE_DROPDOWN_ID = re.compile(r'plnMain_ddlReportCardRuns|ddlReportPeriods|ddlCompetencies|ddlReportingPeriod|plnMain_ddlReportPeriods|plnMain_ddlCompetencies')
+CYCLE_OPTION_KEYWORDS = ['CYCLE', 'REPORTING PERIOD', 'INTERIM', 'SEMESTER', 'QUARTER', 'RUN']
+CYCLE_COLUMN = re.compile(r'^C\d+$')
+
+def get_layout_plan(fingerprint, build_plan, cacheable=None):
+    """Return the cached plan for a layout fingerprint, building it on first sight"""
+    plan = layout_plans.get(fingerprint)
+    if plan is None:
+        plan = build_plan()
+        if cacheable is None or cacheable(plan):
+            if len(layout_plans) >= LAYOUT_PLAN_LIMIT:
+                layout_plans.clear()
+            layout_plans[fingerprint] = plan
+    return plan
+
+def assignments_page_fingerprint(soup, selects, refresh_btn):
+    # ASP.NET control names encode the page's control tree, so the dropdown ids/names, the
+    # Refresh View postback and the form action identify the layout
+    form = soup.find('form')
+    action = form.get('action') if form else None
+    onclick = refresh_btn.get('onclick') if refresh_btn else None
+    return ('assignments', action, onclick, tuple((select.get('id'), select.get('name')) for select in selects))
+
+def build_assignments_plan(selects, refresh_btn):
+    """Work out which dropdown is the cycle selector and the Refresh View postback target"""
+    cycle_select = None
     
     # 1. Try specifically identified IDs first
-    cycle_dropdown = soup.find('select', id=re.compile(r'plnMain_ddlReportCardRuns|ddlReportPeriods|ddlCompetencies|ddlReportingPeriod|plnMain_ddlReportPeriods|plnMain_ddlCompetencies'))
+    for idx, select in enumerate(selects):
+        if select.get('id') and CYCLE_DROPDOWN_ID.search(select.get('id')):
+            cycle_select = idx
+            break
     
     # 2. If not found, look for any dropdown with cycle-like options
-    if not cycle_dropdown:
+    if cycle_select is None:
         print("Cycle dropdown not found by ID, searching by option content...")
-        selects = soup.find_all('select')
-        for select in selects:
-            options = select.find_all('option')
-            if not options: continue
-            
-            # Check first few options text
+        for idx, select in enumerate(selects):
             # Look for patterns like "Cycle 1", "3rd Interim", "Semester 1", etc.
-            is_valid = False
-            for opt in options:
-                txt = opt.get_text(strip=True).upper()
-                if any(k in txt for k in ['CYCLE', 'REPORTING PERIOD', 'INTERIM', 'SEMESTER', 'QUARTER', 'RUN']):
-                    is_valid = True
-                    break
-            
-            if is_valid:
-                cycle_dropdown = select
+            options = select.find_all('option')
+            if any(any(k in opt.get_text(strip=True).upper() for k in CYCLE_OPTION_KEYWORDS) for opt in options):
+                cycle_select = idx
                 print(f"Found cycle dropdown by content: ID={select.get('id')}")
                 break
+    
+    # The button ID is usually plnMain_btnRefreshView and its __EVENTTARGET 'ctl00$plnMain$btnRefreshView',
+    # but confirm it from onclick="__doPostBack('TARGET','')" when present
+    refresh_target = 'ctl00$plnMain$btnRefreshView'
+    if refresh_btn and refresh_btn.get('onclick'):
+        match = re.search(r"__doPostBack\('([^']*)'", refresh_btn.get('onclick'))
+        if match:
+            refresh_target = match.group(1)
+    
+    return {'cycle_select': cycle_select, 'refresh_target': refresh_target}
 
-    if cycle_dropdown:
-        options = cycle_dropdown.find_all('option')
-        for opt in options:
-            txt = opt.get_text(strip=True)
-            val = opt.get('value')
-            if txt and val:
-                available_cycles.append({'text': txt, 'value': val})
-                if opt.get('selected'):
-                    current_cycle = val
+def get_report_card_plan(report_card_table):
+    """Column plan for a report card table, keyed by its header row"""
+    header_row = report_card_table.find('tr', class_='sg-asp-table-header-row')
+    if not header_row:
+        header_row = report_card_table.find('tr')
+    headers = tuple(th.get_text(strip=True) for th in header_row.find_all(['th', 'td'])) if header_row else ()
+    
+    def build_plan():
+        # Map cycle names (C1, C2, etc.) to column indices
+        cycle_indices = {header: idx for idx, header in enumerate(headers) if CYCLE_COLUMN.match(header)}
+        print(f"Found cycle columns: {cycle_indices}")
+        return {
+            'cycle_indices': cycle_indices,
+            'column_count': len(headers),
+            # Columns probed (in order) for the first posted grade in a row
+            'grade_columns': tuple(range(7, min(len(headers), 22)))
+        }
+    
+    return get_layout_plan(('report_card', headers), build_plan)
 
-        # If a specific cycle is requested and it's different from current
-        if cycle and cycle != current_cycle:
-            print(f"Switching cycle from {current_cycle} to {cycle}")
-            
-            # Prepare data for POST request
-            form = soup.find('form')
-            if form:
-                post_data = {}
-                
-                # 1. Get all hidden inputs (VIEWSTATE, EVENTVALIDATION, etc.)
-                hidden_inputs = form.find_all('input', type='hidden')
-                for hidden in hidden_inputs:
-                    name = hidden.get('name')
-                    value = hidden.get('value', '')
-                    if name:
-                        post_data[name] = value
-                
-                # 2. Get all Select (Dropdown) values, preserving current state
-                selects = form.find_all('select')
-                for select in selects:
-                    name = select.get('name')
-                    if not name: continue
-                    
-                    # Default to selected option
-                    selected_opt = select.find('option', selected=True)
-                    if selected_opt:
-                        post_data[name] = selected_opt.get('value', '')
-                    else:
-                        # Fallback to first option
-                        first_opt = select.find('option')
-                        if first_opt:
-                            post_data[name] = first_opt.get('value', '')
-
-                # 3. Update the Cycle Dropdown to the requested cycle
-                # Identify the cycle dropdown name again from the element we found
-                if cycle_dropdown.get('name'):
-                    post_data[cycle_dropdown.get('name')] = cycle
-                
-                # 4. Trigger the Refresh View action
-                # Based on analysis, we need to target the Refresh View button
-                # The button ID is usually plnMain_btnRefreshView, but the __EVENTTARGET is 'ctl00$plnMain$btnRefreshView'
-                # We can try to deduce it or hardcode the common one found.
-                
-                refresh_target = 'ctl00$plnMain$btnRefreshView'
-                
-                # Verify if we can find the button to confirm the target name
-                refresh_btn = soup.find('button', id='plnMain_btnRefreshView')
-                if refresh_btn and refresh_btn.get('onclick'):
-                    # Extract target from onclick="__doPostBack('TARGET','')"
-                    match = re.search(r"__doPostBack\('([^']*)'", refresh_btn.get('onclick'))
-                    if match:
-                        refresh_target = match.group(1)
-                
-                print(f"Using EventTarget: {refresh_target}")
-                post_data['__EVENTTARGET'] = refresh_target
-                post_data['__EVENTARGUMENT'] = ''
-                
-                grades_response = sess.post(grades_url, data=post_data)
-                soup = BeautifulSoup(grades_response.text, 'html.parser')
-                
-                # Update current cycle after switch (assuming success)
-                current_cycle = cycle
+# Parsed results memoized per session and page, keyed by a hash of the raw body
+parse_memo = {} # session_id -> {(page, variant): (digest, result)}
+parse_memo_stats = {'hits': 0, 'misses': 0}
+
+# Hidden ASP.NET fields that change on every response without the grades changing
+VOLATILE_FIELDS = ('__VIEWSTATE', '__VIEWSTATEGENERATOR', '__EVENTVALIDATION', '__EVENTTARGET', '__EVENTARGUMENT', '__LASTFOCUS')
+VOLATILE_INPUT = re.compile(r'<input[^>]*name="(' + '|'.join(VOLATILE_FIELDS) + r')"[^>]*>')
 
+def content_digest(html):
+    """Hash the grade-bearing <form> section of a page, ignoring volatile hidden fields"""
+    start = html.find('<form')
+    end = html.rfind('</form>')
+    section = html[start:end] if start != -1 and end > start else html
+    return hashlib.sha256(VOLATILE_INPUT.sub('', section).encode()).hexdigest()
+
+def hidden_field_value(html, field_name):
+    """Value of a volatile hidden input read from the raw body, or None if it can't be read reliably"""
+    for match in VOLATILE_INPUT.finditer(html):
+        if match.group(1) == field_name:
+            value = re.search(r'value="([^"&]*)"', match.group(0))
+            return value.group(1) if value else None
+    return None
+
+def memo_lookup(session_id, key, digest):
+    entry = parse_memo.get(session_id, {}).get(key)
+    if entry and entry[0] == digest:
+        return entry[1]
+    return None
+
+def memo_store(session_id, key, digest, result):
+    if session_id:
+        parse_memo.setdefault(session_id, {})[key] = (digest, result)
+
+def record_parse(skipped):
+    # Counted once per call: a hit means no page was parsed to answer it
+    parse_memo_stats['hits' if skipped else 'misses'] += 1
+
+def parse_course_grades(soup):
     grades = []
     classes = soup.find_all('div', class_='AssignmentClass')
     
     for idx, cls in enumerate(classes):
         course_name_elem = cls.find('a', class_='sg-header-heading')
         if course_name_elem:
-            course_name = course_name_elem.get_text(strip=True)
+            course_name = intern_text(course_name_elem.get_text(strip=True))
             
             avg_elem = cls.find('span', class_='sg-header-heading sg-right')
             grade_text = ''
@@ -242,16 +283,164 @@ def get_grades_data(sess, cycle=None, session_id=None):
             
             assignments = get_assignments_for_class_internal(cls)
             
-            grades.append({
-                'name': course_name,
-                'grade': grade_text,
-                'numeric_grade': numeric_grade,
-                'gpa': course_gpa,
-                'course_id': str(idx),
-                'assignments': assignments
-            })
+            grades.append(Course(
+                name=course_name,
+                grade=grade_text,
+                numeric_grade=numeric_grade,
+                gpa=course_gpa,
+                course_id=str(idx),
+                assignments=assignments
+            ))
+    
+    return grades
+
+def parse_assignments_page(soup):
+    """Parse the default Assignments.aspx page into its memo entry (result and the inputs needed to
+    switch cycles) plus this response's volatile hidden field values"""
+    available_cycles = []
+    current_cycle = None
+    
+    # Look up the extraction plan for this page layout; only learned again when the layout changes
+    selects = soup.find_all('select')
+    refresh_btn = soup.find('button', id='plnMain_btnRefreshView')
+    # A miss depends on option content the fingerprint doesn't cover, so only a found dropdown is cached
+    plan = get_layout_plan(assignments_page_fingerprint(soup, selects, refresh_btn),
+                           lambda: build_assignments_plan(selects, refresh_btn),
+                           cacheable=lambda plan: plan['cycle_select'] is not None)
+    
+    cycle_dropdown = None
+    if plan['cycle_select'] is not None:
+        cycle_dropdown = selects[plan['cycle_select']]
+    
+    postback = None
+    volatile = {}
+    if cycle_dropdown:
+        options = cycle_dropdown.find_all('option')
+        for opt in options:
+            txt = opt.get_text(strip=True)
+            val = opt.get('value')
+            if txt and val:
+                available_cycles.append({'text': intern_text(txt), 'value': intern_text(val)})
+                if opt.get('selected'):
+                    current_cycle = val
+        
+        form = soup.find('form')
+        if form:
+            fields = {}
+            
+            # 1. Get all hidden inputs; volatile ones (VIEWSTATE, EVENTVALIDATION, etc.) change on
+            # every response, so only their names are kept in the memo
+            hidden_inputs = form.find_all('input', type='hidden')
+            for hidden in hidden_inputs:
+                name = hidden.get('name')
+                if name in VOLATILE_FIELDS:
+                    volatile[name] = hidden.get('value', '')
+                elif name:
+                    fields[name] = hidden.get('value', '')
+            
+            # 2. Get all Select (Dropdown) values, preserving current state
+            for select in form.find_all('select'):
+                name = select.get('name')
+                if not name: continue
+                
+                # Default to selected option
+                selected_opt = select.find('option', selected=True)
+                if selected_opt:
+                    fields[name] = selected_opt.get('value', '')
+                else:
+                    # Fallback to first option
+                    first_opt = select.find('option')
+                    if first_opt:
+                        fields[name] = first_opt.get('value', '')
+            
+            postback = {
+                'fields': fields,
+                'volatile_names': tuple(volatile),
+                'cycle_select_name': cycle_dropdown.get('name'),
+                'refresh_target': plan['refresh_target']
+            }
+    
+    page = {
+        'result': (parse_course_grades(soup), available_cycles, current_cycle),
+        'postback': postback
+    }
+    return page, volatile
+
+def cycle_switch_needed(page, cycle):
+    return bool(cycle) and cycle != page['result'][2] and page['postback'] is not None
+
+def read_volatile_fields(html, names):
+    """Volatile hidden field values read from the raw body, or None if any can't be found"""
+    values = {}
+    for name in names:
+        value = hidden_field_value(html, name)
+        if value is None:
+            return None
+        values[name] = value
+    return values
+
+def post_cycle_switch(sess, grades_url, postback, volatile, cycle):
+    """POST the Refresh View postback for a cycle using the inputs saved from the default page"""
+    post_data = dict(postback['fields'])
+    post_data.update(volatile)
+    
+    # Update the Cycle Dropdown to the requested cycle
+    if postback['cycle_select_name']:
+        post_data[postback['cycle_select_name']] = cycle
     
-    return grades, available_cycles, current_cycle
+    # Trigger the Refresh View action (target resolved when the plan was built)
+    refresh_target = postback['refresh_target']
+    print(f"Using EventTarget: {refresh_target}")
+    post_data['__EVENTTARGET'] = refresh_target
+    post_data['__EVENTARGUMENT'] = ''
+    
+    return sess.post(grades_url, data=post_data)
+
+def get_grades_data(sess, cycle=None, session_id=None):
+    grades_url = f"{BASE_URL}/HomeAccess/Content/Student/Assignments.aspx"
+    
+    # Initial fetch
+    # A cycle switch needs the default page's state (ViewState etc.) before it can POST
+    grades_response = sess.get(grades_url)
+    html = grades_response.text
+    
+    # The default page memo keeps the parsed result and the postback inputs, so an unchanged
+    # page never needs parsing, even when another cycle is requested
+    digest = content_digest(html)
+    page = memo_lookup(session_id, ('assignments', None), digest)
+    volatile = None
+    if page is not None and cycle_switch_needed(page, cycle):
+        # ViewState etc. come from the raw body; if any can't be read that way, parse the page instead
+        volatile = read_volatile_fields(html, page['postback']['volatile_names'])
+        if volatile is None:
+            page = None
+    
+    parsed = page is None
+    if page is None:
+        page, volatile = parse_assignments_page(BeautifulSoup(html, 'html.parser'))
+        memo_store(session_id, ('assignments', None), digest, page)
+    
+    _, available_cycles, current_cycle = page['result']
+    
+    # If a specific cycle is requested and it's different from current
+    if not cycle_switch_needed(page, cycle):
+        record_parse(not parsed)
+        return page['result']
+    
+    print(f"Switching cycle from {current_cycle} to {cycle}")
+    grades_response = post_cycle_switch(sess, grades_url, page['postback'], volatile, cycle)
+    
+    digest = content_digest(grades_response.text)
+    result = memo_lookup(session_id, ('assignments', cycle), digest)
+    if result is None:
+        parsed = True
+        soup = BeautifulSoup(grades_response.text, 'html.parser')
+        # Update current cycle after switch (assuming success)
+        result = (parse_course_grades(soup), available_cycles, cycle)
+        memo_store(session_id, ('assignments', cycle), digest, result)
+    
+    record_parse(not parsed)
+    return result
 
 def get_assignments_for_class(sess, course_index):
     grades_url = f"{BASE_URL}/HomeAccess/Content/Student/Assignments.aspx"
@@ -265,29 +454,7 @@ def get_assignments_for_class(sess, course_index):
     try:
         idx = int(course_index)
         if idx < len(classes):
-            cls = classes[idx]
-            
-            assignment_table = cls.find('table', class_='sg-asp-table')
-            
-            if assignment_table:
-                rows = assignment_table.find_all('tr', class_='sg-asp-table-data-row')
-                
-                for row in rows:
-                    cells = row.find_all('td')
-                    if len(cells) >= 4:
-                        date_due = cells[0].get_text(strip=True)
-                        date_assigned = cells[1].get_text(strip=True)
-                        assignment_name = cells[2].get_text(strip=True)
-                        category = cells[3].get_text(strip=True)
-                        score = cells[4].get_text(strip=True) if len(cells) > 4 else 'N/A'
-                        
-                        assignments.append({
-                            'date_due': date_due,
-                            'date_assigned': date_assigned,
-                            'name': assignment_name,
-                            'category': category,
-                            'score': score
-                        })
+            assignments = get_assignments_for_class_internal(classes[idx])
     except (ValueError, IndexError):
         pass
     
@@ -295,30 +462,229 @@ def get_assignments_for_class(sess, course_index):
 
 user_sessions = {}
 user_credentials = {}
-user_viewstates = {} # Cache for viewstates to speed up switching
 
 # Session cleanup - remove sessions older than 2 hours
 session_timestamps = {}
+SESSION_MAX_AGE = timedelta(hours=2)
+
+# Cookie jars are written to disk so a restarted process can resume HAC sessions
+# without logging in again. Passwords are never persisted.
+SESSION_STORE_DIR = os.environ.get('GRADEVIEW_SESSION_DIR') or os.path.join(tempfile.gettempdir(), 'gradeview_sessions')
+persisted_cookie_jars = {} # Last jar written per session, to skip redundant writes
+session_store_secure = None # Result of checking SESSION_STORE_DIR's owner and mode
+
+# HAC drops idle sessions after roughly 20 minutes, so ping well before that
+KEEPALIVE_INTERVAL = timedelta(minutes=int(os.environ.get('GRADEVIEW_KEEPALIVE_MINUTES', '10')))
+KEEPALIVE_URL = f"{BASE_URL}/HomeAccess/Home/WeekView"
+session_keepalives = {} # Last successful keep-alive ping per session
+keepalive_thread = None
+keepalive_lock = threading.Lock()
+
+def session_store_path(session_id):
+    # Session IDs are generated with secrets.token_hex(16); reject anything else
+    if not session_id or not re.fullmatch(r'[0-9a-f]{32}', session_id):
+        return None
+    return os.path.join(SESSION_STORE_DIR, f"{session_id}.json")
+
+def session_store_ready():
+    """Create the session store if needed and check that only this user can access it"""
+    global session_store_secure
+    if session_store_secure is None:
+        try:
+            os.makedirs(SESSION_STORE_DIR, mode=0o700, exist_ok=True)
+            # makedirs ignores the mode for an existing directory (e.g. one pre-created in a shared /tmp)
+            st = os.lstat(SESSION_STORE_DIR)
+            owned = not hasattr(os, 'getuid') or st.st_uid == os.getuid()
+            session_store_secure = stat.S_ISDIR(st.st_mode) and owned and not (st.st_mode & 0o077)
+        except OSError as e:
+            print(f"Session store unavailable: {str(e)}")
+            session_store_secure = False
+        if not session_store_secure:
+            print(f"Not persisting sessions: {SESSION_STORE_DIR} must be a directory owned by this user with mode 0700")
+    return session_store_secure
+
+def persist_session(session_id):
+    """Write the session's cookie jar to disk if it changed and stamp it with the last use"""
+    path = session_store_path(session_id)
+    sess = user_sessions.get(session_id)
+    if not path or sess is None or not session_store_ready():
+        return
+    
+    cookies = [
+        {
+            'name': c.name,
+            'value': c.value,
+            'domain': c.domain,
+            'path': c.path,
+            'secure': c.secure,
+            'expires': c.expires
+        }
+        for c in sess.cookies
+    ]
+    payload = json.dumps({'cookies': cookies}, sort_keys=True)
+    
+    try:
+        if persisted_cookie_jars.get(session_id) != payload:
+            tmp_path = f"{path}.tmp"
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w') as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+            persisted_cookie_jars[session_id] = payload
+        
+        # The file's mtime records when the session was last used (not when cookies last
+        # rotated), so restore and cleanup measure the same idle time as cleanup_old_sessions
+        last_used = session_timestamps.get(session_id, datetime.now()).timestamp()
+        os.utime(path, (last_used, last_used))
+    except OSError as e:
+        print(f"Failed to persist session: {str(e)}")
+
+def remove_persisted_session(session_id):
+    persisted_cookie_jars.pop(session_id, None)
+    path = session_store_path(session_id)
+    if path:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+def load_persisted_session(session_id):
+    """Rebuild a requests session from its saved cookie jar, or return None"""
+    path = session_store_path(session_id)
+    if not path or not session_store_ready():
+        return None
+    
+    try:
+        last_used = datetime.fromtimestamp(os.path.getmtime(path))
+        if datetime.now() - last_used > SESSION_MAX_AGE:
+            remove_persisted_session(session_id)
+            return None
+        with open(path) as f:
+            payload = f.read()
+        data = json.loads(payload)
+    except (OSError, ValueError):
+        return None
+    
+    sess = requests.Session()
+    for c in data.get('cookies', []):
+        sess.cookies.set(c['name'], c['value'], domain=c.get('domain'), path=c.get('path', '/'),
+                         secure=c.get('secure', False), expires=c.get('expires'))
+    persisted_cookie_jars[session_id] = payload
+    return sess
+
+def sweep_persisted_sessions():
+    """Delete saved jars idle past SESSION_MAX_AGE, including ones for sessions this process never saw"""
+    if not session_store_ready():
+        return
+    cutoff = time.time() - SESSION_MAX_AGE.total_seconds()
+    try:
+        names = os.listdir(SESSION_STORE_DIR)
+    except OSError:
+        return
+    for name in names:
+        if not name.endswith(('.json', '.json.tmp')):
+            continue
+        try:
+            path = os.path.join(SESSION_STORE_DIR, name)
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                persisted_cookie_jars.pop(name.split('.')[0], None)
+        except OSError:
+            pass
+
+def ping_session(sess):
+    """Send a cheap request to keep a HAC session alive; False only if HAC logged it out"""
+    response = sess.get(KEEPALIVE_URL, allow_redirects=False, timeout=10)
+    if response.is_redirect and 'LogOn' in response.headers.get('Location', ''):
+        return False
+    # Upstream errors (e.g. a brief 5xx) raise so callers retry instead of dropping the session
+    response.raise_for_status()
+    return True
+
+def keepalive_due_sessions():
+    """Active sessions that have been idle long enough to need a keep-alive ping"""
+    current_time = datetime.now()
+    due = []
+    for session_id, sess in list(user_sessions.items()):
+        last_used = session_timestamps.get(session_id)
+        if not last_used or current_time - last_used > SESSION_MAX_AGE:
+            continue
+        last_touch = max(last_used, session_keepalives.get(session_id, last_used))
+        if current_time - last_touch >= KEEPALIVE_INTERVAL:
+            due.append((session_id, sess))
+    return due
+
+def run_keepalive():
+    while True:
+        sweep_persisted_sessions()
+        time.sleep(60)
+        for session_id, sess in keepalive_due_sessions():
+            try:
+                if ping_session(sess):
+                    session_keepalives[session_id] = datetime.now()
+                    persist_session(session_id)
+                elif user_sessions.get(session_id) is sess:
+                    # Let validate_session log in again on the next request. Skipped if a request
+                    # thread already replaced this session, so its new session and jar survive
+                    print(f"Keep-alive found expired HAC session {session_id[:8]}")
+                    user_sessions.pop(session_id, None)
+                    session_keepalives.pop(session_id, None)
+                    remove_persisted_session(session_id)
+            except Exception as e:
+                # Not a logout; the session stays due and is retried on the next tick
+                print(f"Keep-alive failed, will retry: {str(e)}")
+
+def start_keepalive():
+    """Start the background keep-alive scheduler once per process"""
+    global keepalive_thread
+    if os.environ.get('GRADEVIEW_KEEPALIVE', '1') == '0':
+        return
+    with keepalive_lock:
+        if keepalive_thread is None or not keepalive_thread.is_alive():
+            keepalive_thread = threading.Thread(target=run_keepalive, name='hac-keepalive', daemon=True)
+            keepalive_thread.start()
 
 def cleanup_old_sessions():
     """Remove sessions older than 2 hours"""
     current_time = datetime.now()
     expired_sessions = []
-    for session_id, timestamp in session_timestamps.items():
-        if current_time - timestamp > timedelta(hours=2):
+    for session_id, timestamp in list(session_timestamps.items()):
+        if current_time - timestamp > SESSION_MAX_AGE:
             expired_sessions.append(session_id)
     
     for session_id in expired_sessions:
         user_sessions.pop(session_id, None)
-        user_viewstates.pop(session_id, None)
         session_timestamps.pop(session_id, None)
+        session_keepalives.pop(session_id, None)
+        parse_memo.pop(session_id, None)
+        remove_persisted_session(session_id)
+    
+    sweep_persisted_sessions()
 
 def validate_session(session_id):
-    """Validate session and update timestamp"""
+    """Validate session and update timestamp; returns the HAC session, or None"""
     if not session_id:
-        return False
+        return None
+    
+    # Fetched once so a concurrent keep-alive drop can't remove it between check and use
+    sess = user_sessions.get(session_id)
+    if sess is None:
+        # Resume from the saved cookie jar first (e.g. after a restart); one GET instead of a full login
+        sess = load_persisted_session(session_id)
+        if sess is not None:
+            try:
+                if ping_session(sess):
+                    user_sessions[session_id] = sess
+                    session_timestamps[session_id] = datetime.now()
+                    session_keepalives[session_id] = datetime.now()
+                    start_keepalive()
+                    return sess
+                # HAC logged this session out, so the saved jar is useless
+                remove_persisted_session(session_id)
+            except Exception as e:
+                # Keep the jar so a later request can retry once HAC recovers
+                print(f"Session restore failed: {str(e)}")
         
-    if session_id not in user_sessions:
         # Try to re-login if we have credentials
         if session_id in user_credentials:
             try:
@@ -328,17 +694,69 @@ def validate_session(session_id):
                 if not error and sess:
                     user_sessions[session_id] = sess
                     session_timestamps[session_id] = datetime.now()
-                    return True
+                    persist_session(session_id)
+                    start_keepalive()
+                    return sess
             except Exception as e:
                 print(f"Auto-login failed: {str(e)}")
-        return False
+        return None
 
     # Update timestamp for active session
     session_timestamps[session_id] = datetime.now()
     # Cleanup old sessions periodically
     if len(session_timestamps) % 10 == 0:
         cleanup_old_sessions()
-    return True
+    return sess
+
+def deep_sizeof(obj, seen=None):
+    """Approximate bytes retained by obj, following containers and instance attributes"""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen or isinstance(obj, (type, type(sys), type(deep_sizeof))):
+        return 0
+    seen.add(id(obj))
+    
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    else:
+        if hasattr(obj, '__dict__'):
+            size += deep_sizeof(vars(obj), seen)
+        for slot in getattr(type(obj), '__slots__', ()):
+            if hasattr(obj, slot):
+                size += deep_sizeof(getattr(obj, slot), seen)
+    return size
+
+def session_memory_usage(session_id, seen=None):
+    """Bytes retained for one session, broken down by store"""
+    if seen is None:
+        seen = set()
+    stores = {
+        'http_session': user_sessions,
+        'credentials': user_credentials,
+        'timestamp': session_timestamps,
+        'keepalive': session_keepalives,
+        'persisted_cookies': persisted_cookie_jars,
+        'parse_memo': parse_memo,
+    }
+    usage = {}
+    for name, store in stores.items():
+        # Read once; the keep-alive thread may drop entries concurrently
+        value = store.get(session_id)
+        if value is not None:
+            usage[name] = deep_sizeof(value, seen)
+    usage['total'] = sum(usage.values())
+    return usage
+
+@app.after_request
+def save_session_cookies(response):
+    # HAC may rotate its auth cookies on any request; keep the on-disk jar current
+    session_id = request.headers.get('X-Session-ID')
+    if session_id in user_sessions:
+        persist_session(session_id)
+    return response
 
 @app.errorhandler(404)
 def not_found(e):
@@ -378,6 +796,8 @@ def login():
         user_sessions[session_id] = sess
         user_credentials[session_id] = {'username': username, 'password': password}
         session_timestamps[session_id] = datetime.now()
+        persist_session(session_id)
+        start_keepalive()
         
         return jsonify({'session_id': session_id, 'message': 'Login successful'})
     except Exception as e:
@@ -389,11 +809,10 @@ def login():
 def grades():
     session_id = request.headers.get('X-Session-ID')
     
-    if not validate_session(session_id):
+    sess = validate_session(session_id)
+    if not sess:
         return jsonify({'error': 'Session expired or invalid. Please log in again.'}), 401
     
-    sess = user_sessions[session_id]
-    
     try:
         cycle_param = request.args.get('cycle')
         grades_data, available_cycles, current_cycle = get_grades_data(sess, cycle=cycle_param, session_id=session_id)
@@ -401,15 +820,15 @@ def grades():
         total = 0
         count = 0
         for grade in grades_data:
-            if grade['numeric_grade']:
-                total += grade['numeric_grade']
+            if grade.numeric_grade:
+                total += grade.numeric_grade
                 count += 1
         
         overall_avg = round(total / count, 2) if count > 0 else 0
         
         highlighted_course = None
         if grades_data:
-            valid_courses = [g for g in grades_data if g['numeric_grade'] is not None]
+            valid_courses = [g for g in grades_data if g.numeric_grade is not None]
             if valid_courses:
                 highlighted_course = random.choice(valid_courses)
         
@@ -427,7 +846,8 @@ def grades():
 def calculate_gpa():
     session_id = request.headers.get('X-Session-ID')
     
-    if not validate_session(session_id):
+    sess = validate_session(session_id)
+    if not sess:
         return jsonify({'error': 'Session expired or invalid. Please log in again.'}), 401
     
     try:
@@ -435,14 +855,12 @@ def calculate_gpa():
         selected_course_ids = data.get('selected_courses', [])
         excluded_course_names = data.get('excluded_courses', [])  # Course names to exclude from all cycles
         
-        sess = user_sessions[session_id]
-        
         # Get current courses
         grades_data, _, _ = get_grades_data(sess, session_id=session_id)
         current_course_gpas = []
         for grade in grades_data:
-            if grade['course_id'] in selected_course_ids and grade['gpa'] is not None:
-                current_course_gpas.append(grade['gpa'])
+            if grade.course_id in selected_course_ids and grade.gpa is not None:
+                current_course_gpas.append(grade.gpa)
         
         # Automatically fetch report card data for past cycles
         past_cycle_gpas = []
@@ -471,6 +889,7 @@ def calculate_gpa():
                     report_card_table = cycle_soup.find('table', id='plnMain_dgReportCard')
                     
                     if report_card_table:
+                        plan = get_report_card_plan(report_card_table)
                         cycle_courses = []
                         rows = report_card_table.find_all('tr', class_='sg-asp-table-data-row')
                         
@@ -490,24 +909,28 @@ def calculate_gpa():
                                 if course_name in excluded_course_names:
                                     continue
                                 
+                                grade_columns = plan['grade_columns']
+                                if len(cells) != plan['column_count']:
+                                    grade_columns = range(7, min(len(cells), 22))
+                                
                                 grade_found = None
-                                for i in range(7, min(len(cells), 22)):
+                                for i in grade_columns:
                                     cell_text = cells[i].get_text(strip=True)
-                                    if cell_text and re.match(r'^\d+$', cell_text):
+                                    if cell_text.isdecimal():
                                         grade_found = int(cell_text)
                                         break
                                 
                                 if grade_found:
                                     course_gpa = calculate_gpa_for_grade(grade_found, course_name)
-                                    cycle_courses.append({
-                                        'course_name': course_name,
-                                        'grade': grade_found,
-                                        'gpa': round(course_gpa, 2)
-                                    })
+                                    cycle_courses.append(PastCycleCourse(
+                                        course_name=course_name,
+                                        grade=grade_found,
+                                        gpa=round(course_gpa, 2)
+                                    ))
                         
                         # Calculate average GPA for this cycle
                         if cycle_courses:
-                            cycle_avg = sum(c['gpa'] for c in cycle_courses) / len(cycle_courses)
+                            cycle_avg = sum(c.gpa for c in cycle_courses) / len(cycle_courses)
                             past_cycle_gpas.append(cycle_avg)
                             past_cycles_detail.append({
                                 'cycle_name': cycle_name,
@@ -539,128 +962,138 @@ def calculate_gpa():
 def assignments(course_id):
     session_id = request.headers.get('X-Session-ID')
     
-    if not validate_session(session_id):
+    sess = validate_session(session_id)
+    if not sess:
         return jsonify({'error': 'Session expired or invalid. Please log in again.'}), 401
     
-    sess = user_sessions[session_id]
-    
     try:
         assignments_data = get_assignments_for_class(sess, course_id)
         return jsonify({'assignments': assignments_data})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def latest_report_card_run(soup):
+    """RCRun to fetch if the page isn't already showing the latest report card run"""
+    dropdown = soup.find('select', id='plnMain_ddlRCRuns')
+    if dropdown:
+        options = dropdown.find_all('option')
+        if options:
+            last_value = options[-1].get('value')
+            
+            selected_option = dropdown.find('option', selected=True)
+            current_value = selected_option.get('value') if selected_option else None
+            
+            if current_value != last_value:
+                parts = last_value.split('-')
+                return parts[0] if len(parts) >= 2 else last_value
+    return None
+
+def parse_report_card(soup):
+    report_card_table = soup.find('table', id='plnMain_dgReportCard')
+    
+    if not report_card_table:
+        return {'cycles': [], 'overall_gpa': 0}
+
+    # Map cycle columns using the plan learned for this header layout
+    cycle_indices = get_report_card_plan(report_card_table)['cycle_indices']
+    
+    cycles_data = {c: [] for c in cycle_indices.keys()}
+    
+    rows = report_card_table.find_all('tr', class_='sg-asp-table-data-row')
+    
+    for row in rows:
+        cells = row.find_all('td')
+        if len(cells) < 2: continue
+        
+        course_code = intern_text(cells[0].get_text(strip=True))
+        course_link = cells[1].find('a')
+        course_name = intern_text(course_link.get_text(strip=True) if course_link else cells[1].get_text(strip=True))
+        
+        for cycle_name, idx in cycle_indices.items():
+            if idx < len(cells):
+                grade_text = cells[idx].get_text(strip=True)
+                if grade_text.isdecimal():
+                    grade = int(grade_text)
+                    gpa = round(calculate_gpa_for_grade(grade, course_name), 2)
+                    
+                    cycles_data[cycle_name].append(ReportCardRow(
+                        course=course_name,
+                        course_code=course_code,
+                        grade=grade,
+                        numeric_grade=grade,
+                        gpa=gpa
+                    ))
+
+    all_cycles = []
+    # Sort cycles by number (C1, C2...)
+    sorted_cycles = sorted(cycles_data.keys(), key=lambda x: int(x[1:]))
+    
+    for cycle_key in sorted_cycles:
+        courses = cycles_data[cycle_key]
+        if courses:
+            total_gpa = sum(c.gpa for c in courses)
+            avg_gpa = round(total_gpa / len(courses), 2)
+            
+            all_cycles.append({
+                'cycle_name': f"Cycle {cycle_key[1:]}",
+                'courses': courses,
+                'average_gpa': avg_gpa
+            })
+    
+    overall_gpa = 0
+    total_courses = 0
+    for cycle in all_cycles:
+        for course in cycle['courses']:
+            if course.gpa:
+                overall_gpa += course.gpa
+                total_courses += 1
+    
+    overall_avg_gpa = round(overall_gpa / total_courses, 2) if total_courses > 0 else 0
+    
+    return {
+        'cycles': all_cycles,
+        'overall_gpa': overall_avg_gpa
+    }
+
 @app.route('/api/report-card', methods=['GET'])
 def report_card():
     session_id = request.headers.get('X-Session-ID')
     
-    if not validate_session(session_id):
+    sess = validate_session(session_id)
+    if not sess:
         return jsonify({'error': 'Session expired or invalid. Please log in again.'}), 401
     
-    sess = user_sessions[session_id]
-    
     try:
         grades_url = f"{BASE_URL}/HomeAccess/Content/Student/ReportCards.aspx"
         grades_response = sess.get(grades_url)
-        soup = BeautifulSoup(grades_response.text, 'html.parser')
-        
-        # Check if we are on the latest report card run
-        dropdown = soup.find('select', id='plnMain_ddlRCRuns')
-        if dropdown:
-            options = dropdown.find_all('option')
-            if options:
-                last_option = options[-1]
-                last_value = last_option.get('value')
-                
-                selected_option = dropdown.find('option', selected=True)
-                current_value = selected_option.get('value') if selected_option else None
-                
-                # If we are not on the latest run, fetch it
-                if current_value != last_value:
-                    print(f"Switching to latest report card run: {last_value}")
-                    parts = last_value.split('-')
-                    rcrun = parts[0] if len(parts) >= 2 else last_value
-                    
-                    grades_response = sess.get(f"{grades_url}?RCRun={rcrun}")
-                    soup = BeautifulSoup(grades_response.text, 'html.parser')
-
-        report_card_table = soup.find('table', id='plnMain_dgReportCard')
-        
-        if not report_card_table:
-            return jsonify({'cycles': [], 'overall_gpa': 0})
-
-        # Find headers to map columns
-        header_row = report_card_table.find('tr', class_='sg-asp-table-header-row')
-        if not header_row:
-            header_row = report_card_table.find('tr')
-        
-        headers = [th.get_text(strip=True) for th in header_row.find_all(['th', 'td'])]
         
-        # Map cycle names (C1, C2, etc.) to column indices
-        cycle_indices = {}
-        for idx, header in enumerate(headers):
-            if re.match(r'^C\d+$', header):
-                cycle_indices[header] = idx
-        
-        print(f"Found cycle columns: {cycle_indices}")
-        
-        cycles_data = {c: [] for c in cycle_indices.keys()}
-        
-        rows = report_card_table.find_all('tr', class_='sg-asp-table-data-row')
-        
-        for row in rows:
-            cells = row.find_all('td')
-            if len(cells) < 2: continue
-            
-            course_code = cells[0].get_text(strip=True)
-            course_link = cells[1].find('a')
-            course_name = course_link.get_text(strip=True) if course_link else cells[1].get_text(strip=True)
-            
-            for cycle_name, idx in cycle_indices.items():
-                if idx < len(cells):
-                    grade_text = cells[idx].get_text(strip=True)
-                    if grade_text and re.match(r'^\d+$', grade_text):
-                        grade = int(grade_text)
-                        gpa = round(calculate_gpa_for_grade(grade, course_name), 2)
-                        
-                        cycles_data[cycle_name].append({
-                            'course': course_name,
-                            'course_code': course_code,
-                            'grade': grade,
-                            'numeric_grade': grade,
-                            'gpa': gpa
-                        })
-
-        all_cycles = []
-        # Sort cycles by number (C1, C2...)
-        sorted_cycles = sorted(cycles_data.keys(), key=lambda x: int(x[1:]))
+        # The landing page either is the latest run (parsed result) or tells us which run to fetch
+        digest = content_digest(grades_response.text)
+        landing = memo_lookup(session_id, ('report_card', None), digest)
+        parsed = landing is None
+        if landing is None:
+            soup = BeautifulSoup(grades_response.text, 'html.parser')
+            rcrun = latest_report_card_run(soup)
+            landing = {'rcrun': rcrun, 'result': None if rcrun else parse_report_card(soup)}
+            memo_store(session_id, ('report_card', None), digest, landing)
         
-        for cycle_key in sorted_cycles:
-            courses = cycles_data[cycle_key]
-            if courses:
-                total_gpa = sum(c['gpa'] for c in courses)
-                avg_gpa = round(total_gpa / len(courses), 2)
-                
-                all_cycles.append({
-                    'cycle_name': f"Cycle {cycle_key[1:]}",
-                    'courses': courses,
-                    'average_gpa': avg_gpa
-                })
+        if not landing['rcrun']:
+            record_parse(not parsed)
+            return jsonify(landing['result'])
         
-        overall_gpa = 0
-        total_courses = 0
-        for cycle in all_cycles:
-            for course in cycle['courses']:
-                if course['gpa']:
-                    overall_gpa += course['gpa']
-                    total_courses += 1
+        rcrun = landing['rcrun']
+        print(f"Switching to latest report card run: {rcrun}")
+        grades_response = sess.get(f"{grades_url}?RCRun={rcrun}")
         
-        overall_avg_gpa = round(overall_gpa / total_courses, 2) if total_courses > 0 else 0
+        digest = content_digest(grades_response.text)
+        result = memo_lookup(session_id, ('report_card', rcrun), digest)
+        if result is None:
+            parsed = True
+            result = parse_report_card(BeautifulSoup(grades_response.text, 'html.parser'))
+            memo_store(session_id, ('report_card', rcrun), digest, result)
         
-        return jsonify({
-            'cycles': all_cycles,
-            'overall_gpa': overall_avg_gpa
-        })
+        record_parse(not parsed)
+        return jsonify(result)
 
     except Exception as e:
         print(f"Report card error: {str(e)}")
@@ -672,7 +1105,8 @@ def refresh_all_cycles():
     session_id = request.headers.get('X-Session-ID')
     
     # 1. Validate Existing Session or Restore
-    if not validate_session(session_id):
+    sess = validate_session(session_id)
+    if not sess:
         # Allow client to send credentials to re-login explicitly if session is dead
         data = request.json or {}
         if data.get('username') and data.get('password'):
@@ -684,11 +1118,11 @@ def refresh_all_cycles():
             user_sessions[session_id] = sess
             user_credentials[session_id] = {'username': data['username'], 'password': data['password']}
             session_timestamps[session_id] = datetime.now()
+            persist_session(session_id)
+            start_keepalive()
         else:
             return jsonify({'error': 'Session expired. Please log in again.'}), 401
     
-    sess = user_sessions[session_id]
-    
     try:
         # Start fresh with current cycle to get the list
         grades_data, available_cycles, current_cycle = get_grades_data(sess, session_id=session_id)
@@ -725,5 +1159,52 @@ def refresh_all_cycles():
         print(traceback.format_exc())
         return jsonify({'error': str(e)}), 500
 
+def debug_endpoints_enabled():
+    # Only exposed when running in debug mode or explicitly enabled
+    return app.debug or bool(os.environ.get('GRADEVIEW_DEBUG_ENDPOINTS'))
+
+@app.route('/api/debug/memory', methods=['GET'])
+def debug_memory():
+    if not debug_endpoints_enabled():
+        return jsonify({'error': 'API endpoint not found'}), 404
+    
+    session_ids = set(user_sessions) | set(user_credentials) | set(session_timestamps)
+    
+    sessions = {}
+    total_bytes = 0
+    shared_seen = set()
+    for session_id in session_ids:
+        # Never echo full session IDs back; a short prefix is enough to tell them apart
+        sessions[session_id[:8]] = session_memory_usage(session_id)
+        # The total counts every object once, so interned names shared between sessions aren't added again
+        total_bytes += session_memory_usage(session_id, shared_seen)['total']
+    
+    # Caches shared by all sessions, excluding anything already counted above
+    shared = {'layout_plans': deep_sizeof(layout_plans, shared_seen)}
+    
+    return jsonify({
+        'session_count': len(session_ids),
+        'total_bytes': total_bytes,
+        'average_bytes': round(total_bytes / len(session_ids)) if session_ids else 0,
+        'shared_bytes': shared,
+        'sessions': sessions
+    })
+
+@app.route('/api/debug/parse-memo', methods=['GET'])
+def debug_parse_memo():
+    if not debug_endpoints_enabled():
+        return jsonify({'error': 'API endpoint not found'}), 404
+    
+    hits = parse_memo_stats['hits']
+    misses = parse_memo_stats['misses']
+    lookups = hits + misses
+    
+    return jsonify({
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / lookups, 4) if lookups > 0 else 0,
+        'entries': sum(len(pages) for pages in parse_memo.values())
+    })
+
 if __name__ == '__main__':
     app.run(port=5003, debug=True)
\ No newline at end of file